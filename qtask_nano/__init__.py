@@ -2,6 +2,7 @@ from .task_queue import TaskQueue
 
 from .task import Task
 from .worker import Worker
+from .async_worker import AsyncWorker
 from .queue import RedisQueue, PostgreSQLQueue
 from .task_query import TaskQuery, RedisQueryBackend, PostgreSQLQueryBackend, TaskQueryCLI
 # from .query_cli import main
@@ -12,6 +13,6 @@ __all__ = [
     'Task', 'TaskQueue', 'RedisQueue', 'PostgreSQLQueue',
     'TaskQuery', 'RedisQueryBackend', 'PostgreSQLQueryBackend',
     'TaskQueryCLI',
-    'Worker',
+    'Worker', 'AsyncWorker',
     'logger',
 ]
\ No newline at end of file
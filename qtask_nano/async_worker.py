@@ -0,0 +1,175 @@
+import time
+import asyncio
+import inspect
+import traceback
+from .task_queue import TaskQueue, Task
+from .worker import Worker
+from .logger import logger
+
+
+class AsyncWorker(Worker):
+    """基于asyncio的任务处理器
+
+    轮询、keep-alive定时器和任务处理共享一个事件循环，可同时处理多个任务:
+        - async handler/回调直接在事件循环中await
+        - 同步handler/回调在默认线程池中执行，不阻塞事件循环
+        - keep-alive通过loop.call_later定时触发，无需额外线程
+        - 队列操作复用同步TaskQueue，在线程池中执行
+    """
+    def __init__(self, queue: TaskQueue, worker_id: str, concurrency: int = 1):
+        """
+        concurrency: 同时处理的任务数；>1时队列操作会在多个线程中并发执行，应使用Redis后端
+            （PostgreSQL后端共用一个cursor，并发调用会互相覆盖结果）
+        """
+        super().__init__(queue, worker_id, concurrency)
+
+    def register_task(self, task_type: str, handler,
+                      weight: int = 1,
+                      result_callback=None,
+                      keep_alive_callback=None,
+                      keep_alive_interval: int = 120,
+                      batch_size: int = 1):
+        """同Worker.register_task；AsyncWorker不做批量预取，batch_size只能为1"""
+        if batch_size != 1:
+            raise ValueError("AsyncWorker does not support batch_size other than 1")
+        super().register_task(task_type, handler, weight, result_callback,
+                              keep_alive_callback, keep_alive_interval)
+
+    async def run(self, poll_timeout: int = 1):
+        if self._scheduling_dirty:
+            self._refresh_scheduling()
+        self.running = True
+        loop = asyncio.get_running_loop()
+        logger.info(f"AsyncWorker {self.worker_id} started, concurrency: {self.concurrency}")
+        
+        slots = asyncio.Semaphore(self.concurrency)
+        inflight = set()
+        pending = None  # 线程池中尚未返回的取任务调用，取消时需等待其结果并移回todo
+
+        def _on_done(f):
+            inflight.discard(f)
+            slots.release()
+
+        cnt = 0
+        try:
+            while self.running:
+                await slots.acquire()
+                future = None
+                try:
+                    task_type = self._choose_task_type()
+                    handler_info = self.task_handlers[task_type]
+                    keep_alive_callback = handler_info.keep_alive_callback
+                    if keep_alive_callback:
+                        now_ns = time.monotonic_ns()
+                        if now_ns > handler_info.start_ns + handler_info.keep_alive_interval_ns:
+                            handler_info.start_ns = now_ns
+                            await self._call(keep_alive_callback, task_type)
+
+                    # shield: 取消只中断等待，线程中取出的任务仍可拿到并移回todo
+                    pending = loop.run_in_executor(None, self.queue.get_task, task_type)
+                    task = await asyncio.shield(pending)
+                    if not task:
+                        # 按权重选中的类型暂无任务：阻塞等待任一已注册类型的任务
+                        pending = loop.run_in_executor(None, self.queue.blocking_get_task, self._task_types, poll_timeout)
+                        task = await asyncio.shield(pending)
+                    pending = None
+                    if not task:
+                        continue
+
+                    logger.info("[cnt={}][AsyncWorker {}] Processing task: {} ({})", cnt, self.worker_id, task.task_id, task.task_type)
+                    cnt += 1
+                    future = asyncio.ensure_future(self._process_task(task))
+                    inflight.add(future)
+                    future.add_done_callback(_on_done)
+                finally:
+                    # 未交给_process_task（无任务、出错或被取消）时归还槽位
+                    if future is None:
+                        slots.release()
+        except asyncio.CancelledError:
+            # 被取消（如KeyboardInterrupt）：等待取任务调用返回，取到的任务移回todo
+            if pending is not None:
+                task = (await asyncio.gather(pending, return_exceptions=True))[0]
+                if isinstance(task, Task):
+                    await loop.run_in_executor(None, self.queue.requeue_task, task)
+                    logger.info(f'[AsyncWorker {self.worker_id}]: Requeued fetched task: {task.task_id} ({task.task_type})')
+            # 取消处理中的任务，由_process_task移回todo
+            requeued = len(inflight)
+            for future in list(inflight):
+                future.cancel()
+            await asyncio.gather(*inflight, return_exceptions=True)
+            logger.info(f'[AsyncWorker {self.worker_id}]: Cancelled, {requeued} in-flight tasks requeued')
+            raise
+        finally:
+            self.running = False
+            if inflight:
+                await asyncio.gather(*inflight, return_exceptions=True)
+            for task_type, handler_info in self.task_handlers.items():
+                if handler_info.keep_alive_callback:
+                    await self._call(handler_info.keep_alive_callback, task_type)
+            logger.info(f"AsyncWorker {self.worker_id} stopped")
+
+    async def _call(self, fn, *args):
+        """async函数直接await，同步函数在线程池中执行"""
+        if inspect.iscoroutinefunction(fn):
+            return await fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def _process_task(self, task: Task):
+        handler_info = self.task_handlers.get(task.task_type)
+        if not handler_info:
+            # 说明系统推送过来一个错误任务
+            logger.error("No handler for task type: {}", task.task_type)
+            return
+        
+        loop = asyncio.get_running_loop()
+        start_ns = time.monotonic_ns()
+        keep_alive_handle = None
+        keep_alive_callback = handler_info.keep_alive_callback
+        keep_alive_interval = handler_info.keep_alive_interval
+
+        def _keep_alive():
+            nonlocal keep_alive_handle
+            asyncio.ensure_future(self._keep_alive(keep_alive_callback, task))
+            keep_alive_handle = loop.call_later(keep_alive_interval, _keep_alive)
+
+        if keep_alive_callback:
+            keep_alive_handle = loop.call_later(keep_alive_interval, _keep_alive)
+
+        handler = handler_info.handler
+        handler_future = None
+        try:
+            if inspect.iscoroutinefunction(handler):
+                result = await handler(task.params)
+            else:
+                # 同步handler在线程中无法中断，shield使取消时仍能等到它结束
+                handler_future = loop.run_in_executor(None, handler, task.params)
+                result = await asyncio.shield(handler_future)
+            
+            result_callback = handler_info.result_callback
+            if result_callback:
+                await self._call(result_callback, task, result)
+            
+            # 只有在任务处理和回调都成功后才标记为完成
+            await loop.run_in_executor(None, self.queue.mark_done, task)
+            elapsed = (time.monotonic_ns() - start_ns) / 1e9
+            logger.info("Task completed: {} (duration: {:.2f}s)", task.task_id, elapsed)
+        except asyncio.CancelledError:
+            if handler_future is not None and not handler_future.done():
+                # 等线程中的handler结束后再移回todo，避免同一任务被并发处理
+                await asyncio.gather(handler_future, return_exceptions=True)
+            await loop.run_in_executor(None, self.queue.requeue_task, task)
+            logger.info(f'[AsyncWorker {self.worker_id}]: Requeued task: {task.task_id} ({task.task_type})')
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            logger.error("Task failed: {} - {}", task.task_id, e)
+            await loop.run_in_executor(None, self.queue.mark_error, task)
+        finally:
+            if keep_alive_handle:
+                keep_alive_handle.cancel()
+
+    async def _keep_alive(self, callback, task: Task):
+        try:
+            await self._call(callback, task)
+        except Exception as callback_error:
+            logger.warning("Keep-alive callback error for task {}: {}", task.task_id, callback_error)
@@ -19,6 +19,7 @@ class BaseQueue:
         self.cleanup_interval = cleanup_interval  # 可配置的清理间隔
         self.cleanup_thread = None
         self.running = False
+        self._stop_event = threading.Event()
         
     def start_cleanup_thread(self):
         """启动过期Key清理线程"""
@@ -26,6 +27,7 @@ class BaseQueue:
             return
             
         self.running = True
+        self._stop_event.clear()
         self.cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
         self.cleanup_thread.start()
         logger.info("Started key cleanup thread")
@@ -39,6 +41,7 @@ class BaseQueue:
     def stop_cleanup_thread(self):
         """停止过期Key清理线程"""
         self.running = False
+        self._stop_event.set()
         if self.cleanup_thread and self.cleanup_thread.is_alive():
             self.cleanup_thread.join(timeout=5)
         logger.info("Stopped key cleanup thread")
@@ -50,17 +53,45 @@ class BaseQueue:
                 self.cleanup_expired_keys()
             except Exception as e:
                 logger.error(f"Cleanup error: {str(e)}")
-            time.sleep(self.cleanup_interval)
+            # 用Event等待，close时可立即唤醒
+            self._stop_event.wait(self.cleanup_interval)
             
+    def close(self):
+        """停止清理线程并释放连接（子类扩展）"""
+        self.stop_cleanup_thread()
+        
     def cleanup_expired_keys(self):
         """清理过期Key（子类实现）"""
         raise NotImplementedError
         
     def push_key(self, key):
         raise NotImplementedError
+
+    def push_keys(self, keys: List[str]):
+        """批量添加Key；默认逐个push，子类可一次往返完成"""
+        for key in keys:
+            self.push_key(key)
         
     def pop_key(self):
         raise NotImplementedError
+
+    def pop_keys(self, count: int) -> List[str]:
+        """批量获取最多count个Key；默认逐个pop，子类可一次往返完成"""
+        keys = []
+        for _ in range(count):
+            key = self.pop_key()
+            if key is None:
+                break
+            keys.append(key)
+        return keys
+
+    def bpop_key(self, timeout: float):
+        """阻塞获取Key，最多等待timeout秒；默认退化为轮询，子类可用服务端阻塞实现"""
+        key = self.pop_key()
+        if key is None and timeout > 0:
+            time.sleep(timeout)
+            key = self.pop_key()
+        return key
         
     def doing_to_done(self, key):
         raise NotImplementedError
@@ -73,6 +104,10 @@ class BaseQueue:
         
     def doing_to_todo(self, key):
         raise NotImplementedError
+
+    def touch_doing_key(self, key) -> bool:
+        """重置doing中Key的开始时间；Key已不在doing中（如被过期清理）时返回False"""
+        raise NotImplementedError
         
     def get_timeout_doing_keys(self, timeout_seconds: int) -> List[str]:
         raise NotImplementedError
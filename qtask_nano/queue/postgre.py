@@ -1,10 +1,20 @@
 import datetime
+import select
+import time
+import weakref
 from typing import Dict, List, Optional
 import re
 import logging
 from .base import BaseQueue
 from ..logger import logger
 
+def _safe_close(conn):
+    try:
+        conn.close()
+    except Exception as e:
+        logger.warning(f"Failed to close PostgreSQL connection: {e}")
+
+
 class PostgreSQLQueue(BaseQueue):
     '''
     PostgreSQL队列实现（支持Key过期时间）
@@ -44,6 +54,11 @@ class PostgreSQLQueue(BaseQueue):
         )
         self.conn.autocommit = True
         self.cursor = self.conn.cursor()
+        # push_key通过NOTIFY唤醒bpop_key中LISTEN的worker（频道名最长63字符）
+        self._channel = f"queue_{queue_id}"[:63]
+        self._listening = False
+        # 兜底：对象被回收或解释器退出时关闭连接
+        self._finalizer = weakref.finalize(self, _safe_close, self.conn)
         
         # 初始化数据库表
         self._init_db()
@@ -53,10 +68,10 @@ class PostgreSQLQueue(BaseQueue):
         if self.key_expire:
             self.start_cleanup_thread()
             
-    def __del__(self):
-        self.stop_cleanup_thread()
-        if hasattr(self, 'conn') and self.conn:
-            self.conn.close()
+    def close(self):
+        # 先停止清理线程，避免关闭连接时清理语句仍在执行
+        super().close()
+        self._finalizer()
 
     def _init_db(self):
         """初始化数据库表结构"""
@@ -107,8 +122,24 @@ class PostgreSQLQueue(BaseQueue):
                 "INSERT INTO tasks (queue_id, key, status) VALUES (%s, %s, 'todo')",
                 (self.queue_id, key)
             )
+            self.cursor.execute("SELECT pg_notify(%s, '')", (self._channel,))
             self.conn.commit()
-            logger.debug(f"Pushed key: {key}")
+            logger.debug("Pushed key: {}", key)
+
+    def push_keys(self, keys: List[str]):
+        """一条INSERT添加多个Key，只发一次通知"""
+        from psycopg2.extras import execute_values
+        keys = [key for key in keys if key]
+        if not keys:
+            return
+        execute_values(
+            self.cursor,
+            "INSERT INTO tasks (queue_id, key, status) VALUES %s",
+            [(self.queue_id, key, 'todo') for key in keys],
+        )
+        self.cursor.execute("SELECT pg_notify(%s, '')", (self._channel,))
+        self.conn.commit()
+        logger.debug("Pushed {} keys", len(keys))
 
     def pop_key(self) -> Optional[str]:
         # 获取最早创建的todo任务
@@ -126,10 +157,54 @@ class PostgreSQLQueue(BaseQueue):
                 (task_id,)
             )
             self.conn.commit()
-            logger.debug(f"Popped key: {key}")
+            logger.debug("Popped key: {}", key)
             return key
         return None
 
+    def pop_keys(self, count: int) -> List[str]:
+        """一条语句批量获取最多count个Key"""
+        self.cursor.execute(
+            """
+            UPDATE tasks SET status = 'doing', updated_at = CURRENT_TIMESTAMP, start_time = CURRENT_TIMESTAMP
+            WHERE id IN (
+                SELECT id FROM tasks WHERE status = 'todo' AND queue_id = %s
+                ORDER BY created_at ASC LIMIT %s FOR UPDATE SKIP LOCKED
+            )
+            RETURNING key
+            """,
+            (self.queue_id, count)
+        )
+        keys = [row[0] for row in self.cursor.fetchall()]
+        self.conn.commit()
+        if keys:
+            logger.debug("Popped {} keys", len(keys))
+        return keys
+
+    def bpop_key(self, timeout: float) -> Optional[str]:
+        """阻塞获取Key：LISTEN队列频道，push_key的NOTIFY到达时立即重试"""
+        from psycopg2 import sql
+        if not self._listening:
+            # 先LISTEN再pop，避免两者之间入队的任务通知丢失
+            self.cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self._channel)))
+            self._listening = True
+        # 忙碌期间积累的通知已无意义
+        self.conn.notifies.clear()
+        key = self.pop_key()
+        if key is not None or timeout <= 0:
+            return key
+        
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            if select.select([self.conn], [], [], remaining)[0]:
+                self.conn.poll()
+                self.conn.notifies.clear()
+                key = self.pop_key()
+                if key is not None:
+                    return key
+
     def doing_to_done(self, key: str) -> bool:
         return self._change_status(key, 'done')
 
@@ -142,6 +217,14 @@ class PostgreSQLQueue(BaseQueue):
     def doing_to_todo(self, key: str) -> bool:
         return self._change_status(key, 'todo')
 
+    def touch_doing_key(self, key: str) -> bool:
+        self.cursor.execute(
+            "UPDATE tasks SET updated_at = CURRENT_TIMESTAMP, start_time = CURRENT_TIMESTAMP WHERE key = %s AND status = 'doing' AND queue_id = %s",
+            (key, self.queue_id)
+        )
+        self.conn.commit()
+        return self.cursor.rowcount > 0
+
     def _change_status(self, key: str, new_status: str) -> bool:
         self.cursor.execute(
             "UPDATE tasks SET status = %s, updated_at = CURRENT_TIMESTAMP, start_time = %s WHERE key = %s AND status = 'doing' AND queue_id = %s",
@@ -150,7 +233,7 @@ class PostgreSQLQueue(BaseQueue):
         self.conn.commit()
         success = self.cursor.rowcount > 0
         if success:
-            logger.debug(f"Moved key {key} to {new_status}")
+            logger.debug("Moved key {} to {}", key, new_status)
         return success
 
     def get_doing_keys(self) -> List[str]:
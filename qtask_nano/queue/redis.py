@@ -1,15 +1,151 @@
 import time
+import weakref
 from typing import Dict, List, Optional, Any
-import json
+import orjson
 from .base import BaseQueue
 from ..logger import logger
 
+def _decode(values) -> List[str]:
+    """连接不解码响应（热路径直接使用bytes），对外返回Key列表时统一解码为str"""
+    return [value.decode() for value in values]
+
+
+def _now_ms() -> int:
+    """当前毫秒时间戳，整数运算，避免浮点转换"""
+    return time.time_ns() // 1_000_000
+
+
+# 每个状态一个时间有序集合（:todo_time/:doing_time/...），分数为Key进入该状态的毫秒时间戳；
+# 状态迁移时Key在列表/集合与时间有序集合之间一起移动，清理时每个状态只取出自己的过期候选
+
+# 过期清理脚本，在服务端原子执行，清理期间其他客户端无法pop正在删除的Key
+# KEYS: todo, todo_time, doing, doing_time, done, done_time, error, error_time, null, null_time, claim
+# ARGV: now_ms, todo/doing/done/error/null 过期时间(ms)，小于0表示该状态不清理
+_CLEANUP_SCRIPT = """
+local now = tonumber(ARGV[1])
+local removed = 0
+
+-- claim中滞留的Key（bpop_key取出后、登记doing前进程崩溃）放回todo表尾，下次即被取出；
+-- 正在登记的worker会发现Key已不在claim中而放弃，不会重复处理
+while true do
+    local key = redis.call('RPOP', KEYS[11])
+    if not key then
+        break
+    end
+    redis.call('RPUSH', KEYS[1], key)
+end
+
+-- todo/done/error/null列表：新Key从表头LPUSH，过期Key靠近表尾，LREM count=-1从表尾查找，找到即停
+local function sweep_list(list_key, time_key, expire_ms)
+    if expire_ms < 0 then
+        return
+    end
+    local keys = redis.call('ZRANGEBYSCORE', time_key, 0, '(' .. (now - expire_ms))
+    for _, key in ipairs(keys) do
+        removed = removed + redis.call('LREM', list_key, -1, key)
+        redis.call('ZREM', time_key, key)
+    end
+end
+
+sweep_list(KEYS[1], KEYS[2], tonumber(ARGV[2]))
+
+-- doing: 按开始时间计算过期
+local doing_expire = tonumber(ARGV[3])
+if doing_expire >= 0 then
+    local keys = redis.call('ZRANGEBYSCORE', KEYS[4], 0, '(' .. (now - doing_expire))
+    for _, key in ipairs(keys) do
+        removed = removed + redis.call('SREM', KEYS[3], key)
+        redis.call('ZREM', KEYS[4], key)
+    end
+end
+
+sweep_list(KEYS[5], KEYS[6], tonumber(ARGV[4]))
+sweep_list(KEYS[7], KEYS[8], tonumber(ARGV[5]))
+sweep_list(KEYS[9], KEYS[10], tonumber(ARGV[6]))
+return removed
+"""
+
+# 批量pop脚本：原子地把最多count个Key从todo移入doing
+# KEYS: todo, todo_time, doing, doing_time
+# ARGV: count, now_ms
+_POP_SCRIPT = """
+local keys = {}
+for i = 1, tonumber(ARGV[1]) do
+    local key = redis.call('RPOP', KEYS[1])
+    if not key then
+        break
+    end
+    redis.call('ZREM', KEYS[2], key)
+    redis.call('SADD', KEYS[3], key)
+    redis.call('ZADD', KEYS[4], ARGV[2], key)
+    keys[i] = key
+end
+return keys
+"""
+
+# bpop_key的第二步：把BRPOPLPUSH移入claim的Key原子地登记为doing
+# KEYS: claim, todo_time, doing, doing_time
+# ARGV: key, now_ms
+# 返回0表示Key已被清理脚本放回todo，本次获取作废
+_CLAIM_SCRIPT = """
+if redis.call('LREM', KEYS[1], -1, ARGV[1]) == 0 then
+    return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('SADD', KEYS[3], ARGV[1])
+redis.call('ZADD', KEYS[4], ARGV[2], ARGV[1])
+return 1
+"""
+
+# doing -> todo/done/error/null：原子地移动Key及其时间记录；
+# 目标列表超出上限时从表尾淘汰最旧的Key，并一并删除其时间记录，不留孤儿
+# KEYS: doing, doing_time, target, target_time
+# ARGV: key, now_ms, max_len（小于0表示不限）
+_MOVE_SCRIPT = """
+local moved = redis.call('SREM', KEYS[1], ARGV[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('LPUSH', KEYS[3], ARGV[1])
+redis.call('ZADD', KEYS[4], ARGV[2], ARGV[1])
+local max_len = tonumber(ARGV[3])
+local trimmed = 0
+if max_len >= 0 then
+    for i = 1, redis.call('LLEN', KEYS[3]) - max_len do
+        redis.call('ZREM', KEYS[4], redis.call('RPOP', KEYS[3]))
+        trimmed = trimmed + 1
+    end
+end
+return {moved, trimmed}
+"""
+
+# error -> todo：原子地移回全部error Key
+# KEYS: error, error_time, todo, todo_time
+# ARGV: now_ms
+_REQUEUE_ERROR_SCRIPT = """
+local n = 0
+while true do
+    local key = redis.call('RPOPLPUSH', KEYS[1], KEYS[3])
+    if not key then
+        break
+    end
+    redis.call('ZREM', KEYS[2], key)
+    redis.call('ZADD', KEYS[4], ARGV[1], key)
+    n = n + 1
+end
+return n
+"""
+
 
 class RedisQueue(BaseQueue):
     '''
     Redis队列实现（支持Key过期时间）
     '''
-    def __init__(self, queue_id, redis_uri=None, key_expire: Dict[str, int] = None, cleanup_interval: int = 60):
+    def __init__(self, queue_id, redis_uri=None, key_expire: Dict[str, int] = None, cleanup_interval: int = 60,
+                 connection_pool=None, max_terminal_keys: Optional[int] = None):
+        """
+        connection_pool: 外部传入的redis连接池，多个队列共用；此时忽略redis_uri，close时不断开该连接池
+        max_terminal_keys: done/null列表保留的最近Key数量上限，超出时丢弃最早的Key；默认不限制
+            （error列表供requeue重试，不受此限制）
+        """
         import redis
         super().__init__(queue_id, redis_uri, key_expire, cleanup_interval)
         
@@ -20,34 +156,92 @@ class RedisQueue(BaseQueue):
         self._null_rkey = queue_id + ':null'
         self._control_rkey = queue_id + ':control'
         self._state_rkey = queue_id + ':state'
+        # bpop_key的中转列表：BRPOPLPUSH先原子地移入此处，再登记doing
+        self._claim_rkey = queue_id + ':claim'
+        # 各状态的进入时间（有序集合，分数为毫秒时间戳），用于按状态计算过期
+        self._todo_time_rkey = queue_id + ':todo_time'
         self._doing_time_rkey = queue_id + ':doing_time'
-        self._create_time_rkey = queue_id + ':create_time'  # 新增：记录Key创建时间
-
-        if isinstance(redis_uri, str):
-            # 解析Redis URI
-            parts = redis_uri.split("://")[1].split("@")
-            if len(parts) > 1:
-                user_pass, host_port_db = parts
-                user, password = user_pass.split(":")
+        self._done_time_rkey = queue_id + ':done_time'
+        self._error_time_rkey = queue_id + ':error_time'
+        self._null_time_rkey = queue_id + ':null_time'
+        # 旧版本的创建时间记录（所有状态共用：哈希':create_time'、有序集合':created_time'），reset/clear_all_keys时删除
+        self._legacy_rkeys = [queue_id + ':create_time', queue_id + ':created_time']
+        # 顺序与清理脚本的ARGV一致
+        self._status_rkeys = {
+            'todo': self._todo_rkey,
+            'doing': self._doing_rkey,
+            'done': self._done_rkey,
+            'error': self._error_rkey,
+            'null': self._null_rkey,
+        }
+        self._time_rkeys = {
+            self._todo_rkey: self._todo_time_rkey,
+            self._doing_rkey: self._doing_time_rkey,
+            self._done_rkey: self._done_time_rkey,
+            self._error_rkey: self._error_time_rkey,
+            self._null_rkey: self._null_time_rkey,
+        }
+        self._expire_ms = {status: expire * 1000 for status, expire in self.key_expire.items()}
+        # 只有done/null可按数量截断：error中的Key需保留，供move_error_to_todo重试
+        self._max_len = {self._done_rkey: max_terminal_keys, self._null_rkey: max_terminal_keys}
+        # 顺序与清理脚本的KEYS一致
+        self._cleanup_rkeys = [
+            self._todo_rkey,
+            self._todo_time_rkey,
+            self._doing_rkey,
+            self._doing_time_rkey,
+            self._done_rkey,
+            self._done_time_rkey,
+            self._error_rkey,
+            self._error_time_rkey,
+            self._null_rkey,
+            self._null_time_rkey,
+            self._claim_rkey,
+        ]
+
+        if connection_pool is None:
+            if isinstance(redis_uri, str):
+                # 解析Redis URI
+                parts = redis_uri.split("://")[1].split("@")
+                if len(parts) > 1:
+                    user_pass, host_port_db = parts
+                    user, password = user_pass.split(":")
+                else:
+                    host_port_db = parts[0]
+                    password = None
+                host_port, db = host_port_db.split("/")
+                host, port = host_port.split(":")
+                port = int(port)
+                db = int(db)
             else:
-                host_port_db = parts[0]
-                password = None
-            host_port, db = host_port_db.split("/")
-            host, port = host_port.split(":")
-            port = int(port)
-            db = int(db)
-        else:
-            config = redis_uri or {}
-            host = config.get('host', 'localhost')
-            port = config.get('port', 6379)
-            password = config.get('password', None)
-            db = config.get('db', 0)
+                config = redis_uri or {}
+                host = config.get('host', 'localhost')
+                port = config.get('port', 6379)
+                password = config.get('password', None)
+                db = config.get('db', 0)
             
-        pool = redis.ConnectionPool(
-            host=host, port=port, password=password, 
-            db=db, decode_responses=True
-        )
+            # - 安装hiredis后redis-py自动使用C解析器，lrange等批量回复解析更快
+            # - BlockingConnectionPool在连接耗尽时等待空闲连接，而非直接报错
+            # - redis-py已默认对连接设置TCP_NODELAY
+            pool = redis.BlockingConnectionPool(
+                host=host, port=port, password=password, 
+                db=db,
+                max_connections=32,
+                socket_keepalive=True,
+                health_check_interval=30,
+            )
+            # 兜底：对象被回收或解释器退出时断开自建的连接池
+            self._finalizer = weakref.finalize(self, pool.disconnect)
+        else:
+            pool = connection_pool
+            self._finalizer = None
         self.redis = redis.Redis(connection_pool=pool)
+        # register_script使用EVALSHA，脚本未缓存时自动回退到EVAL
+        self._cleanup_script = self.redis.register_script(_CLEANUP_SCRIPT)
+        self._pop_script = self.redis.register_script(_POP_SCRIPT)
+        self._move_script = self.redis.register_script(_MOVE_SCRIPT)
+        self._claim_script = self.redis.register_script(_CLAIM_SCRIPT)
+        self._requeue_error_script = self.redis.register_script(_REQUEUE_ERROR_SCRIPT)
         self.set_state({"status": "active"})
         logger.info(f"Initialized Redis queue: {queue_id}")
         
@@ -55,77 +249,137 @@ class RedisQueue(BaseQueue):
         if self.key_expire:
             self.start_cleanup_thread()
 
-    def __del__(self):
-        self.stop_cleanup_thread()
+    def close(self):
+        super().close()
+        if self._finalizer:
+            self._finalizer()
 
     def reset(self, todo=True, doing=True, done=True, error=True, null=True):
+        rkeys = list(self._legacy_rkeys)
         if todo:
-            self.clear_todo_keys()
+            rkeys += [self._todo_rkey, self._todo_time_rkey]
         if doing:
-            self.clear_doing_keys()
+            rkeys += [self._doing_rkey, self._doing_time_rkey]
         if done:
-            self.clear_done_keys()
+            rkeys += [self._done_rkey, self._done_time_rkey]
         if error:
-            self.clear_error_keys()
+            rkeys += [self._error_rkey, self._error_time_rkey]
         if null:
-            self.clear_null_keys()
-            
-        self.clear_create_time_keys()
+            rkeys += [self._null_rkey, self._null_time_rkey]
+        # 一条UNLINK删除所有Key，大集合的内存在Redis后台线程释放，不阻塞服务端
+        self.redis.unlink(*rkeys)
         logger.info("Queue reset")
     
+    # clear_*均使用UNLINK而非DEL：删除大列表/集合时DEL在主线程O(N)释放内存
     def clear_todo_keys(self):
-        self.redis.delete(self._todo_rkey)
+        self.redis.unlink(self._todo_rkey, self._todo_time_rkey)
     
     def clear_done_keys(self):
-        self.redis.delete(self._done_rkey)
+        self.redis.unlink(self._done_rkey, self._done_time_rkey)
     
     def clear_error_keys(self):
-        self.redis.delete(self._error_rkey)
+        self.redis.unlink(self._error_rkey, self._error_time_rkey)
     
     def clear_null_keys(self):
-        self.redis.delete(self._null_rkey)
+        self.redis.unlink(self._null_rkey, self._null_time_rkey)
     
     def clear_create_time_keys(self):
-        self.redis.delete(self._create_time_rkey)
+        """删除旧版本遗留的创建时间记录（当前版本按状态记录时间，随各状态一起清除）"""
+        self.redis.unlink(*self._legacy_rkeys)
     
     def clear_doing_keys(self):
-        self.redis.delete(self._doing_rkey)
-        self.redis.delete(self._doing_time_rkey)    
+        self.redis.unlink(self._doing_rkey, self._doing_time_rkey)
     
     def clear_all_keys(self):
-        self.clear_todo_keys()
-        self.clear_doing_keys()
-        self.clear_done_keys()
-        self.clear_error_keys()
-        self.clear_null_keys()
-        self.clear_create_time_keys()
+        self.redis.unlink(*self._cleanup_rkeys, *self._legacy_rkeys)
 
     def set_state(self, state: Dict[str, Any]):
-        text = json.dumps(state)
+        text = orjson.dumps(state, option=orjson.OPT_NON_STR_KEYS)
         self.redis.set(self._state_rkey, text)
 
     def get_state(self) -> Dict[str, Any]:
         text = self.redis.get(self._state_rkey)
-        return json.loads(text) if text else {}
+        return orjson.loads(text) if text else {}
 
     def push_key(self, key: str):
         if key:
-            # 记录Key创建时间
-            timestamp = int(time.time() * 1000)
-            self.redis.hset(self._create_time_rkey, key, timestamp)
-            
-            self.redis.lpush(self._todo_rkey, key)
-            logger.debug(f"Pushed key: {key}")
+            # 记录Key进入todo的时间
+            timestamp = _now_ms()
+            pipe = self.redis.pipeline()
+            pipe.zadd(self._todo_time_rkey, {key: timestamp})
+            pipe.lpush(self._todo_rkey, key)
+            pipe.execute()
+            logger.debug("Pushed key: {}", key)
+
+    def push_keys(self, keys: List[str], pipe=None):
+        """一次往返添加多个Key
+
+        pipe: 传入时只向其追加命令，由调用方execute，可与其他队列的命令合并为一次往返
+        """
+        keys = [key for key in keys if key]
+        if not keys:
+            return
+        execute = pipe is None
+        if execute:
+            pipe = self.redis.pipeline()
+        timestamp = _now_ms()
+        pipe.zadd(self._todo_time_rkey, dict.fromkeys(keys, timestamp))
+        # LPUSH多个值依次插入表头，RPOP顺序与逐个push_key相同
+        pipe.lpush(self._todo_rkey, *keys)
+        if execute:
+            pipe.execute()
+            logger.debug("Pushed {} keys", len(keys))
+
+    def pipeline(self, transaction: bool = True):
+        """本队列连接上的pipeline，供push_keys(pipe=...)、pipe_info合并多个队列的命令"""
+        return self.redis.pipeline(transaction=transaction)
 
     def pop_key(self) -> Optional[str]:
         key = self.redis.rpop(self._todo_rkey)
         if key:
-            timestamp = int(time.time() * 1000)
-            self.redis.sadd(self._doing_rkey, key)
-            self.redis.zadd(self._doing_time_rkey, {key: timestamp})
-            logger.debug(f"Popped key: {key}")
+            self._todo_to_doing(key)
         return key
 
+    def pop_keys(self, count: int) -> List[str]:
+        """一次往返批量获取最多count个Key"""
+        keys = self._pop_script(
+            keys=[self._todo_rkey, self._todo_time_rkey, self._doing_rkey, self._doing_time_rkey],
+            args=[count, _now_ms()],
+        )
+        if keys:
+            logger.debug("Popped {} keys", len(keys))
+        return keys
+
+    def bpop_key(self, timeout: float) -> Optional[str]:
+        """阻塞获取Key：任务入队时服务端立即唤醒，而非等到下一次轮询
+        
+        doing是集合而非列表，无法用一条阻塞命令直接移入：先BRPOPLPUSH原子地移入claim列表，
+        再由脚本原子地从claim登记到doing。两步之间进程崩溃时Key留在claim中，
+        由清理脚本放回todo（未配置key_expire时清理线程不运行，需调用cleanup_expired_keys）
+        """
+        if timeout <= 0:
+            # BRPOPLPUSH的timeout=0表示永久阻塞
+            return self.pop_key()
+        key = self.redis.brpoplpush(self._todo_rkey, self._claim_rkey, timeout=timeout)
+        if key is None:
+            return None
+        if not self._claim_script(
+            keys=[self._claim_rkey, self._todo_time_rkey, self._doing_rkey, self._doing_time_rkey],
+            args=[key, _now_ms()],
+        ):
+            return None
+        logger.debug("Popped key: {}", key)
+        return key
+
+    def _todo_to_doing(self, key: str):
+        timestamp = _now_ms()
+        pipe = self.redis.pipeline()
+        pipe.zrem(self._todo_time_rkey, key)
+        pipe.sadd(self._doing_rkey, key)
+        pipe.zadd(self._doing_time_rkey, {key: timestamp})
+        pipe.execute()
+        logger.debug("Popped key: {}", key)
+
     def doing_to_done(self, key: str) -> bool:
         return self._doing_to_xxx(key, self._done_rkey)
 
@@ -138,62 +392,93 @@ class RedisQueue(BaseQueue):
     def doing_to_todo(self, key: str) -> bool:
         return self._doing_to_xxx(key, self._todo_rkey)
 
-    def _doing_to_xxx(self, key: str, redis_key: str) -> bool:
+    def touch_doing_key(self, key: str) -> bool:
         pipe = self.redis.pipeline()
-        pipe.srem(self._doing_rkey, key)
-        pipe.zrem(self._doing_time_rkey, key)
-        pipe.lpush(redis_key, key)
-        results = pipe.execute()
-        success = results[0] > 0
+        pipe.sismember(self._doing_rkey, key)
+        pipe.zadd(self._doing_time_rkey, {key: _now_ms()}, xx=True)
+        return bool(pipe.execute()[0])
+
+    def _doing_to_xxx(self, key: str, redis_key: str) -> bool:
+        max_len = self._max_len.get(redis_key)
+        moved, trimmed = self._move_script(
+            keys=[self._doing_rkey, self._doing_time_rkey, redis_key, self._time_rkeys[redis_key]],
+            args=[key, _now_ms(), -1 if max_len is None else max_len],
+        )
+        if trimmed:
+            logger.warning("Trimmed {} oldest keys from {} (max_terminal_keys={})", trimmed, redis_key, max_len)
+        success = moved > 0
         if success:
-            logger.debug(f"Moved key {key} to {redis_key}")
+            logger.debug("Moved key {} to {}", key, redis_key)
         return success
 
     def get_doing_keys(self) -> List[str]:
-        return list(self.redis.smembers(self._doing_rkey))
+        return _decode(self.redis.smembers(self._doing_rkey))
     
     def get_todo_keys(self) -> List[str]:
-        return list(self.redis.lrange(self._todo_rkey, 0, -1))
+        return _decode(self.redis.lrange(self._todo_rkey, 0, -1))
     
     def get_done_keys(self) -> List[str]:
-        return list(self.redis.lrange(self._done_rkey, 0, -1))
+        return _decode(self.redis.lrange(self._done_rkey, 0, -1))
     
     def get_error_keys(self) -> List[str]:
-        return list(self.redis.lrange(self._error_rkey, 0, -1))
+        return _decode(self.redis.lrange(self._error_rkey, 0, -1))
     
     def get_null_keys(self) -> List[str]:
-        return list(self.redis.lrange(self._null_rkey, 0, -1))
+        return _decode(self.redis.lrange(self._null_rkey, 0, -1))
     
     def get_info(self, simple: bool = False) -> Dict[str, Any]:
-        todo_keys = self.get_todo_keys()
-        doing_keys = self.get_doing_keys()
-        done_keys = self.get_done_keys()
-        error_keys = self.get_error_keys()
-        null_keys = self.get_null_keys()
+        pipe = self.redis.pipeline(transaction=False)
+        self.pipe_info(pipe, simple)
+        return self.parse_info(pipe.execute(), simple)
+
+    def pipe_info(self, pipe, simple: bool = False):
+        """向pipeline追加get_info所需的命令，结果交给parse_info解析
+        
+        simple时只取长度（LLEN/SCARD），不传输Key列表
+        """
+        pipe.get(self._state_rkey)
+        if simple:
+            pipe.llen(self._todo_rkey)
+            pipe.scard(self._doing_rkey)
+            pipe.llen(self._done_rkey)
+            pipe.llen(self._error_rkey)
+            pipe.llen(self._null_rkey)
+        else:
+            pipe.lrange(self._todo_rkey, 0, -1)
+            pipe.smembers(self._doing_rkey)
+            pipe.lrange(self._done_rkey, 0, -1)
+            pipe.lrange(self._error_rkey, 0, -1)
+            pipe.lrange(self._null_rkey, 0, -1)
+
+    def parse_info(self, results, simple: bool = False) -> Dict[str, Any]:
+        text, todo, doing, done, error, null = results
+        if simple:
+            counts = (todo, doing, done, error, null)
+        else:
+            todo, doing, done, error, null = map(_decode, (todo, doing, done, error, null))
+            counts = (len(todo), len(doing), len(done), len(error), len(null))
         info = {
-            'state': self.get_state(),
-            'todo_count': len(todo_keys),
-            'doing_count': len(doing_keys),
-            'done_count': len(done_keys),
-            'error_count': len(error_keys),
-            'null_count': len(null_keys),
-            'total_count': len(todo_keys) + len(doing_keys) + len(done_keys) + len(error_keys) + len(null_keys),
+            'state': orjson.loads(text) if text else {},
+            'todo_count': counts[0],
+            'doing_count': counts[1],
+            'done_count': counts[2],
+            'error_count': counts[3],
+            'null_count': counts[4],
+            'total_count': sum(counts),
         }
-        print(f'simple: {simple}')
         if simple:
             return info
-        else:
-            return info | {
-                'todo_keys': todo_keys,
-                'doing_keys': doing_keys,
-                'done_keys': done_keys,
-                'error_keys': error_keys,
-                'null_keys': null_keys,
-            } 
+        return info | {
+            'todo_keys': todo,
+            'doing_keys': doing,
+            'done_keys': done,
+            'error_keys': error,
+            'null_keys': null,
+        }
 
     def get_timeout_doing_keys(self, timeout_seconds: int) -> List[str]:
-        cutoff = int(time.time() * 1000) - timeout_seconds * 1000
-        return self.redis.zrangebyscore(self._doing_time_rkey, 0, cutoff)
+        cutoff = _now_ms() - timeout_seconds * 1000
+        return _decode(self.redis.zrangebyscore(self._doing_time_rkey, 0, cutoff))
 
     def move_timeout_to_todo(self, timeout_seconds: int) -> int:
         timeout_keys = self.get_timeout_doing_keys(timeout_seconds)
@@ -207,81 +492,18 @@ class RedisQueue(BaseQueue):
         return moved_count
     
     def move_error_to_todo(self) -> int:
-        moved_count = 0
-        while True:
-            key = self.redis.rpop(self._error_rkey)
-            if key is None:
-                break
-            self.redis.lpush(self._todo_rkey, key)
-            moved_count += 1
+        moved_count = self._requeue_error_script(
+            keys=[self._error_rkey, self._error_time_rkey, self._todo_rkey, self._todo_time_rkey],
+            args=[_now_ms()],
+        )
         logger.info(f"Moved {moved_count} error keys to todo")
         return moved_count
         
     def cleanup_expired_keys(self):
-        """清理过期Key"""
-        if not self.key_expire:
-            return 0
-            
-        now = int(time.time() * 1000)
-        total_removed = 0
-        
-        # 清理todo状态的过期Key
-        if 'todo' in self.key_expire:
-            expire_ms = self.key_expire['todo'] * 1000
-            todo_keys = self.redis.lrange(self._todo_rkey, 0, -1)
-            for key in todo_keys:
-                create_time = self.redis.hget(self._create_time_rkey, key)
-                if create_time:
-                    age_ms = now - int(create_time)
-                    if age_ms > expire_ms:
-                        # 原子操作：从todo列表和创建时间记录中移除
-                        pipe = self.redis.pipeline()
-                        pipe.lrem(self._todo_rkey, 0, key)  # 移除所有匹配项
-                        pipe.hdel(self._create_time_rkey, key)
-                        pipe.execute()
-                        total_removed += 1
-                        logger.debug(f"【Removed expired】Todo key {key}: create_time={create_time}, age_ms={age_ms}, expire_ms={expire_ms}")
-                        # logger.debug(f"Removed expired todo key: {key}")
-                else:
-                    logger.warning(f"Todo key {key}: no create_time found, skipping cleanup")
-                    # 如果没有创建时间记录，跳过清理，保留Key
-                    # 这种情况可能是由于数据不一致或并发操作导致的
-                    # 不应该删除这些Key，因为它们可能是有效的任务
-        
-        # 清理doing状态的过期Key
-        if 'doing' in self.key_expire:
-            expire_ms = self.key_expire['doing'] * 1000
-            doing_keys = list(self.redis.smembers(self._doing_rkey))
-            for key in doing_keys:
-                start_time = self.redis.zscore(self._doing_time_rkey, key)
-                if start_time and (now - int(start_time)) > expire_ms:
-                    # 原子操作：从doing集合和时间记录中移除
-                    pipe = self.redis.pipeline()
-                    pipe.srem(self._doing_rkey, key)
-                    pipe.zrem(self._doing_time_rkey, key)
-                    pipe.hdel(self._create_time_rkey, key)
-                    pipe.execute()
-                    total_removed += 1
-                    logger.debug(f"Removed expired doing key: {key}")
-        
-        # 清理done/error/null状态的过期Key
-        for status in ['done', 'error', 'null']:
-            if status in self.key_expire:
-                expire_ms = self.key_expire[status] * 1000
-                rkey = getattr(self, f'_{status}_rkey')
-                keys = self.redis.lrange(rkey, 0, -1)
-                for key in keys:
-                    # 对于done/error/null状态，使用创建时间计算过期
-                    create_time = self.redis.hget(self._create_time_rkey, key)
-                    if create_time and (now - int(create_time)) > expire_ms:
-                        # 原子操作：从状态列表和创建时间记录中移除
-                        pipe = self.redis.pipeline()
-                        pipe.lrem(rkey, 0, key)
-                        pipe.hdel(self._create_time_rkey, key)
-                        pipe.execute()
-                        total_removed += 1
-                        logger.debug(f"Removed expired {status} key: {key}")
-        
+        """清理过期Key并回收claim中滞留的Key：在Redis服务端用Lua脚本一次完成，无需把整个列表传回Python"""
+        now = _now_ms()
+        expire_ms = [self._expire_ms.get(status, -1) for status in self._status_rkeys]
+        total_removed = self._cleanup_script(keys=self._cleanup_rkeys, args=[now, *expire_ms])
         logger.debug(f"Cleaned up {total_removed} expired keys")
         return total_removed
 
@@ -295,15 +517,9 @@ class RedisQueue(BaseQueue):
         try:
             # 获取本队列相关的所有key
             queue_keys = [
-                self._todo_rkey,
-                self._doing_rkey,
-                self._done_rkey,
-                self._error_rkey,
-                self._null_rkey,
+                *self._cleanup_rkeys,
                 self._control_rkey,
                 self._state_rkey,
-                self._doing_time_rkey,
-                self._create_time_rkey
             ]
             
             total_memory_bytes = 0
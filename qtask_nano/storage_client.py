@@ -17,16 +17,29 @@ class StorageClient:
         return r.json()
 
     def get_file(self, namespace: str, filename: str, save_to: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """下载文件：指定save_to时流式写入文件，否则在返回值中给出文件内容
+
+        返回值含namespace、filename、size、file_path；
+        未指定save_to时另含content_base64（与此前的JSON接口相同），
+        指定save_to时不含content_base64，文件内容只写入save_to，不在内存中保留
+        """
         url = self.base + f"/get_file/{namespace}/{filename}"
-        r = requests.get(url, timeout=60)
-        if r.status_code == 404:
-            return None
-        r.raise_for_status()
-        data = r.json()
-        content_b64 = data.get("content_base64")
-        if save_to and content_b64:
-            with open(save_to, "wb") as f:
-                f.write(base64.b64decode(content_b64))
+        with requests.get(url, timeout=60, stream=True) as r:
+            if r.status_code == 404:
+                return None
+            r.raise_for_status()
+            data = {
+                "namespace": r.headers.get("X-Namespace", namespace),
+                "filename": filename,
+                "size": int(r.headers.get("X-File-Size", 0)),
+                "file_path": r.headers.get("X-File-Path"),
+            }
+            if save_to:
+                with open(save_to, "wb") as f:
+                    for chunk in r.iter_content(chunk_size=1024 * 1024):
+                        f.write(chunk)
+            else:
+                data["content_base64"] = base64.b64encode(r.content).decode("ascii")
         return data
 
     def delete_file(self, namespace: str, filename: str) -> Dict[str, Any]:
@@ -3,22 +3,26 @@ from typing import Dict, Any, Union, Optional
 import uuid
 import hashlib
 import json
+import orjson
 from .logger import logger
 
 class Task: 
     """任务类"""
+    __slots__ = ('task_type', 'params', 'task_id', 'created_at', '_json')
+
     def __init__(self, task_type: str, params: Dict[str, Any]=None):
         self.task_type = task_type
         self.params = params
         self.task_id = Task.make_task_id(task_type, params)
         self.created_at = time.time()
+        self._json = None
         
     @staticmethod
     def make_task_id(task_type: str, params: Dict[str, Any]=None) -> str:
         param_hash = Task.format_task_params(params)
         tag = str(uuid.uuid4())[:8]
         # 同一个任务可能被多次重试
-        return f"{task_type}-{param_hash}-{int(time.time_ns()/1000)}-{tag}"
+        return f"{task_type}-{param_hash}-{time.time_ns() // 1000}-{tag}"
     
     @staticmethod
     def format_task_params(params: Dict[str, Any]=None) -> str:
@@ -34,12 +38,47 @@ class Task:
             "created_at": self.created_at
         }
 
+    def encoded(self) -> Union[str, bytes]:
+        """序列化后的任务数据，作为队列中的Key
+
+        Note:
+            - 从Redis取出的任务保留原始bytes，新建任务为str
+            - 结果缓存在对象上，mark_done/mark_error/requeue_task 不再重复序列化
+            - 创建后不应再修改任务属性，否则缓存与属性不一致
+        """
+        if self._json is None:
+            data = self.to_dict()
+            try:
+                # OPT_NON_STR_KEYS: 与json一致，允许params中使用非字符串的字典键
+                encoded = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+            except orjson.JSONEncodeError:
+                # orjson不支持的值（如超出64位的整数）交给json
+                encoded = None
+            # orjson把NaN/Infinity编码为null：输出含null时交给json重新编码，保留原值
+            if encoded is None or b'null' in encoded:
+                self._json = json.dumps(data)
+            else:
+                self._json = encoded.decode()
+        return self._json
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
         task = cls(data["task_type"], data["params"])
         task.task_id = data["task_id"]
         task.created_at = data["created_at"]
         return task
+
+    @classmethod
+    def from_encoded(cls, data: Union[str, bytes]):
+        """从队列中的Key还原任务，保留原始数据以便原样写回队列"""
+        try:
+            decoded = orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # json编码的NaN/Infinity等orjson不接受的数据
+            decoded = json.loads(data)
+        task = cls.from_dict(decoded)
+        task._json = data
+        return task
     
     def __repr__(self):
         return f"Task(task_id={self.task_id}, task_type={self.task_type}, params={self.params}, created_at={self.created_at})"
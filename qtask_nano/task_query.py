@@ -64,10 +64,11 @@ class RedisQueryBackend(BaseQueryBackend):
         """获取Redis任务元数据"""
         metadata = {}
         
-        # 获取创建时间
-        create_time = self.redis.hget(f"{queue_id}:create_time", task_key)
-        if create_time:
-            metadata['create_time'] = int(create_time) / 1000
+        # 获取创建时间（记录在任务数据中）
+        try:
+            metadata['create_time'] = json.loads(task_key)['created_at']
+        except (ValueError, TypeError, KeyError):
+            pass
         
         # 获取开始时间（仅对doing状态有效）
         start_time = self.redis.zscore(f"{queue_id}:doing_time", task_key)
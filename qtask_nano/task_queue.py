@@ -7,18 +7,35 @@ from .task import Task
 
 class TaskQueue:
     """通用任务队列封装（支持Key过期时间）"""
-    def __init__(self, namespace: str, uri: str, key_expire: Dict[str, int] = None, cleanup_interval: int = 60):
+    def __init__(self, namespace: str, uri: str, key_expire: Dict[str, int] = None, cleanup_interval: int = 60,
+                 connection_pool=None, max_terminal_keys: int = None):
         """
         key_expire: 各状态Key的过期时间配置（秒）
         格式: {'todo': 3600, 'doing': 7200, 'done': 86400, 'error': 86400, 'null': 86400}
         cleanup_interval: 清理间隔时间（秒），默认60秒（1分钟）
+        connection_pool: 可选，Redis后端共用的连接池（默认每个任务类型的队列各自建立连接池）
+        max_terminal_keys: 可选，Redis后端done/null列表保留的Key数量上限，默认不限制；error列表不截断
         """
         self.namespace = namespace
         self.uri = uri
         self.key_expire = key_expire
         self.cleanup_interval = cleanup_interval
+        self.connection_pool = connection_pool
+        self.max_terminal_keys = max_terminal_keys
         self.queues = {}
         # self.queue = self.make_queue(uri) 
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """关闭所有底层队列（停止清理线程、释放连接）"""
+        for queue in self.queues.values():
+            queue.close()
+        self.queues.clear()
     
     @classmethod
     def from_file(cls, cfg_file: str):
@@ -40,7 +57,8 @@ class TaskQueue:
     
     def make_queue(self, uri: str):
         if uri.startswith("redis://"):
-            return RedisQueue(self.namespace, uri, self.key_expire, self.cleanup_interval)
+            return RedisQueue(self.namespace, uri, self.key_expire, self.cleanup_interval,
+                              connection_pool=self.connection_pool, max_terminal_keys=self.max_terminal_keys)
         elif uri.startswith("postgresql://") or uri.startswith("postgres://"):
             return PostgreSQLQueue(self.namespace, uri, self.key_expire, self.cleanup_interval)
         else:
@@ -67,51 +85,107 @@ class TaskQueue:
             logger.warning(f"Task is None") 
             return 
         # print('add_task:', task)
-        task_data = json.dumps(task.to_dict())
+        task_data = task.encoded()
         queue = self.get_or_make_queue(task.task_type)
         queue.push_key(task_data)
         return task.task_id
     
     def add_tasks(self, tasks: List[Task]) -> List[str]:
         """添加多个任务到队列
+        
+        按任务类型分组批量写入；Redis后端所有类型合并到一个pipeline，只需一次往返
         """
         task_ids = []
+        keys_by_type = {}
         for task in tasks:
-            task_id = self.add_task(task)
-            task_ids.append(task_id)
+            if not task:
+                logger.warning(f"Task is None")
+                task_ids.append(None)
+                continue
+            keys_by_type.setdefault(task.task_type, []).append(task.encoded())
+            task_ids.append(task.task_id)
+        queues = [(self.get_or_make_queue(task_type), keys) for task_type, keys in keys_by_type.items()]
+        if not queues:
+            return task_ids
+        if all(isinstance(queue, RedisQueue) for queue, _ in queues):
+            # 同一uri的队列连接同一个Redis，借用第一个队列的连接发送
+            pipe = queues[0][0].pipeline()
+            for queue, keys in queues:
+                queue.push_keys(keys, pipe=pipe)
+            pipe.execute()
+        else:
+            for queue, keys in queues:
+                queue.push_keys(keys)
         return task_ids
 
-    def get_task(self, task_type: str) -> Optional[Task]:
+    def get_task(self, task_type: str, timeout: float = 0) -> Optional[Task]:
+        """获取一个任务
+
+        Args:
+            timeout: 大于0时阻塞等待最多timeout秒，任务入队即返回
+        """
         queue = self.get_or_make_queue(task_type)
-        task_data = queue.pop_key()
+        task_data = queue.bpop_key(timeout) if timeout > 0 else queue.pop_key()
         if task_data:
-            return Task.from_dict(json.loads(task_data))
+            return self._decode_task(queue, task_data)
         return None
 
+    def _decode_task(self, queue, task_data) -> Optional[Task]:
+        """还原取出（已进入doing）的任务；无法解析的Key移入error，不中断调用方"""
+        try:
+            return Task.from_encoded(task_data)
+        except (ValueError, TypeError, KeyError) as e:
+            logger.error("Undecodable task moved to error: {!r} - {}", task_data, e)
+            queue.doing_to_error(task_data)
+            return None
+
+    def get_tasks_batch(self, task_type: str, n: int) -> List[Task]:
+        """一次往返获取最多n个任务（均进入doing状态）"""
+        queue = self.get_or_make_queue(task_type)
+        tasks = (self._decode_task(queue, data) for data in queue.pop_keys(n))
+        return [task for task in tasks if task is not None]
+
+    def blocking_get_task(self, task_types: List[str], timeout: float) -> Optional[Task]:
+        """阻塞等待task_types中任一类型的任务，最多timeout秒
+
+        Note:
+            - 各任务类型的队列共用namespace对应的Key，一次阻塞pop即覆盖所有类型
+        """
+        if not task_types:
+            return None
+        for task_type in task_types:
+            self.get_or_make_queue(task_type)
+        return self.get_task(task_types[0], timeout=timeout)
+
     def mark_done(self, task: Task):
-        task_data = json.dumps(task.to_dict())
+        task_data = task.encoded()
         queue = self.get_or_make_queue(task.task_type)
         queue.doing_to_done(task_data)
 
     def mark_error(self, task: Task): 
-        task_data = json.dumps(task.to_dict()) 
+        task_data = task.encoded() 
         queue = self.get_or_make_queue(task.task_type) 
         queue.doing_to_error(task_data) 
 
     def mark_null(self, task: Task):
-        task_data = json.dumps(task.to_dict())
+        task_data = task.encoded()
         queue = self.get_or_make_queue(task.task_type)
         queue.doing_to_null(task_data)
 
     def requeue_task(self, task: Task):
-        task_data = json.dumps(task.to_dict())
+        task_data = task.encoded()
         queue = self.get_or_make_queue(task.task_type)
         return queue.doing_to_todo(task_data)
 
+    def touch_task(self, task: Task) -> bool:
+        """重置doing中任务的开始时间，任务已不在doing中时返回False"""
+        queue = self.get_or_make_queue(task.task_type)
+        return queue.touch_doing_key(task.encoded())
+
     def get_timeout_tasks(self, task_type: str, timeout_seconds: float) -> List[Task]:
         queue = self.get_or_make_queue(task_type)
         timeout_data = queue.get_timeout_doing_keys(timeout_seconds)
-        return [Task.from_dict(json.loads(data)) for data in timeout_data]
+        return [Task.from_encoded(data) for data in timeout_data]
 
     def requeue_timeout_tasks(self, task_type: str, timeout_seconds: float) -> int:
         queue = self.get_or_make_queue(task_type) 
@@ -126,15 +200,44 @@ class TaskQueue:
         """
         queue = self.get_or_make_queue(task_type)
         doing_data = queue.get_doing_keys()
-        tasks = []
+        # 预分配列表，解析失败的条目在末尾截掉
+        tasks = [None] * len(doing_data)
+        n = 0
         for data in doing_data:
             try:
-                task = Task.from_dict(json.loads(data)) 
-                tasks.append(task) 
+                tasks[n] = Task.from_encoded(data)
+                n += 1
             except Exception as e: 
                 logger.warning(f"Failed to parse doing task: {data}, error: {e}")
+        del tasks[n:]
         return tasks
 
     def get_info(self, task_type: str, simple: bool = False):
         queue = self.get_or_make_queue(task_type)
-        return queue.get_info(simple)
\ No newline at end of file
+        return queue.get_info(simple)
+
+    def get_info_batch(self, task_types, simple: bool = False) -> Dict[str, Dict]:
+        """批量获取多个任务类型的队列信息，返回 {task_type: info}
+        
+        Redis后端所有命令合并到一个pipeline，只需一次往返；
+        共用同一queue_id的任务类型（同一namespace下即全部）只查询一次
+        """
+        queues = [(task_type, self.get_or_make_queue(task_type)) for task_type in task_types]
+        if not queues:
+            return {}
+        unique = list({queue.queue_id: queue for _, queue in queues}.values())
+        if not all(isinstance(queue, RedisQueue) for queue in unique):
+            infos = {queue.queue_id: queue.get_info(simple) for queue in unique}
+        else:
+            # 同一uri的队列连接同一个Redis，借用第一个队列的连接发送
+            pipe = unique[0].pipeline(transaction=False)
+            for queue in unique:
+                queue.pipe_info(pipe, simple)
+            results = pipe.execute()
+            n = len(results) // len(unique)
+            infos = {
+                queue.queue_id: queue.parse_info(results[i * n:(i + 1) * n], simple)
+                for i, queue in enumerate(unique)
+            }
+        # 各任务类型各持一份副本，调用方（如Worker）会逐个写入task_type等字段
+        return {task_type: dict(infos[queue.queue_id]) for task_type, queue in queues}
\ No newline at end of file
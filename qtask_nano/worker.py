@@ -1,28 +1,78 @@
 import time
 import random
 import json
+import sched
 import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from .task_queue import TaskQueue, Task
 import traceback
 from .logger import logger
 
 
+class _KeepAliveTimer:
+    """单个任务的keep-alive定时，由Worker共享的调度线程触发"""
+    __slots__ = ('callback', 'interval', 'task', 'event', 'cancelled')
+
+    def __init__(self, callback, interval, task: Task):
+        self.callback = callback
+        self.interval = interval
+        self.task = task
+        self.event = None
+        self.cancelled = False
+
+
+class HandlerInfo:
+    """任务类型的注册信息"""
+    __slots__ = ('handler', 'weight', 'result_callback', 'keep_alive_callback',
+                 'keep_alive_interval', 'keep_alive_interval_ns', 'batch_size', 'start_ns')
+
+    def __init__(self, handler, weight: int = 1, result_callback=None,
+                 keep_alive_callback=None, keep_alive_interval: int = 120, batch_size: int = 1):
+        self.handler = handler
+        self.weight = weight
+        self.result_callback = result_callback
+        self.keep_alive_callback = keep_alive_callback
+        self.keep_alive_interval = keep_alive_interval
+        self.keep_alive_interval_ns = int(keep_alive_interval * 1_000_000_000)
+        self.batch_size = batch_size
+        self.start_ns = time.monotonic_ns()  # 上次调用任务类型级keep_alive_callback的时间（整数纳秒）
+
+
 class Worker:
     """任务处理器（支持Key过期时间）"""
-    def __init__(self, queue: TaskQueue, worker_id: str):
+    def __init__(self, queue: TaskQueue, worker_id: str, concurrency: int = 1):
+        """
+        concurrency: 同时处理的任务数；>1时handler在线程池中执行，取任务与处理并行
+            （线程池模式下底层队列会被多线程共用，应使用Redis后端）
+        """
         self.queue = queue
         self.worker_id = worker_id
+        self.concurrency = concurrency
         self.task_handlers = {}
         self.running = False
         self.timeout_seconds = 300  # 默认超时时间5分钟
         self.weights = []
+        self._task_types = ()  # 缓存的任务类型元组，由_refresh_scheduling更新
+        self._scheduling_dirty = False  # register_task后置位，run开始时统一重建调度结构
+        self._random = random.random  # 绑定方法，调度循环中省去属性查找
+        # 批量预取、尚未处理的任务（已处于doing状态）；各类型共用一个队列，
+        # 不论本轮选中哪个类型都先处理，权重低（或为0）的类型不会滞留在doing中
+        self._prefetch = deque()
+        # 所有任务的keep-alive定时共用一个调度线程，首次需要时启动
+        self._scheduler = sched.scheduler(time.monotonic, time.sleep)
+        self._scheduler_wakeup = threading.Event()
+        self._scheduler_stop = threading.Event()
+        self._scheduler_lock = threading.Lock()  # 线程池模式下多个handler线程可能同时启动调度线程
+        self._scheduler_thread = None
         logger.info(f"Worker {worker_id} initialized") 
 
     def register_task(self, task_type: str, handler, 
                       weight: int = 1, 
                       result_callback=None, 
                       keep_alive_callback=None,
-                      keep_alive_interval: int = 120):
+                      keep_alive_interval: int = 120,
+                      batch_size: int = 1):
         """注册任务处理函数 
         
         Args: 
@@ -31,57 +81,136 @@ class Worker:
             weight: 任务权重 这里是概率权重，用于调度本worker在task_types中被选中的概率 
             result_callback: 任务完成后的回调函数，接收 (task, result) 参数
             keep_alive_callback: 任务保持活跃的回调函数，接收 (task, result) 参数
+            batch_size: 每次从队列预取的任务数，>1时一次往返取多个任务，后续迭代直接从本地取
         Note: 
             - 权重越大，被选中的概率越大 
             - 任务可能被覆盖 
+            - 预取的任务在处理前即处于doing状态，取用时重置开始时间；等待期间被过期清理的任务会被跳过
         """
+        if weight < 0:
+            raise ValueError(f"Weight of {task_type} must be non-negative")
+        if weight + sum(info.weight for t, info in self.task_handlers.items() if t != task_type) <= 0:
+            raise ValueError("Total of weights must be greater than zero")
         if task_type in self.task_handlers: 
             logger.warning(f"Task handler for {task_type} already registered, will be overwritten")
         
-        self.task_handlers[task_type] = { 
-            "handler": handler, 
-            "weight": weight, 
-            "result_callback": result_callback, 
-            "keep_alive_callback": keep_alive_callback, 
-            "keep_alive_interval": keep_alive_interval,
-            "start_time": time.time()
-        }
+        self.task_handlers[task_type] = HandlerInfo(
+            handler=handler,
+            weight=weight,
+            result_callback=result_callback,
+            keep_alive_callback=keep_alive_callback,
+            keep_alive_interval=keep_alive_interval,
+            batch_size=batch_size,
+        )
         # 这里不应注册到queue，因为queue是全局共享的，如果worker宕机不会删除注册的task，不符合预期
         # self.queue.on_register_task(self.worker_id, task_type, weight)
-        self.weights = [self.task_handlers[task_type]["weight"] for task_type in self.task_handlers.keys()]
+        # 调度结构（任务类型、权重、别名表）推迟到run时一次性重建
+        self._scheduling_dirty = True
         handler_name = handler.__name__ if hasattr(handler, '__name__') else handler.__class__.__name__
         logger.info(f"Registered task: {task_type}, weight: {weight}: {handler_name}")
 
-    def run(self, poll_timeout: int = 1, delay: float = 1.0):
+    def _refresh_scheduling(self):
+        """按已注册的任务类型重建_task_types、weights与别名表"""
+        self._task_types = tuple(self.task_handlers.keys())
+        self.weights = [handler_info.weight for handler_info in self.task_handlers.values()]
+        self._build_alias_table()
+        self._scheduling_dirty = False
+
+    def _build_alias_table(self):
+        """按self.weights构建Walker别名表（Vose方法），加权选择任务类型为O(1)"""
+        n = len(self.weights)
+        total = sum(self.weights)
+        if total <= 0:
+            raise ValueError("Total of weights must be greater than zero")
+        scaled = [w * n / total for w in self.weights]
+        prob = [0.0] * n
+        alias = [0] * n
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # 剩余项（含浮点误差导致的残留）概率为1
+        for i in large + small:
+            prob[i] = 1.0
+        self._alias_prob = prob
+        self._alias_alias = alias
+        self._alias_types = self._task_types
+        self._alias_n = n
+
+    def _choose_task_type(self) -> str:
+        """别名表O(1)加权选择任务类型
+
+        只取一次随机数：整数部分选列，小数部分与该列概率比较
+        """
+        u = self._random() * self._alias_n
+        i = int(u)
+        if u - i < self._alias_prob[i]:
+            return self._alias_types[i]
+        return self._alias_types[self._alias_alias[i]]
+
+    def run(self, poll_timeout: int = 1, delay: float = 0):
+        """
+        poll_timeout: 无任务时阻塞等待的秒数
+        delay: 限速，相邻两次开始处理任务的最小间隔（秒），0表示不限速
+        """
+        if self._scheduling_dirty:
+            self._refresh_scheduling()
         self.running = True
         logger.info(f"Worker {self.worker_id} started")
-        all_info = self.get_task_queue_info(simple=True)
-        formatted_info = json.dumps(all_info, indent=4)
-        logger.info(f"[Worker {self.worker_id}]: Task queue info: {formatted_info}")
+        # lazy: 仅当日志会被输出时才查询队列信息并序列化
+        logger.opt(lazy=True).info(
+            "[Worker {}]: Task queue info: {}",
+            lambda: self.worker_id,
+            lambda: json.dumps(self.get_task_queue_info(simple=True), indent=4),
+        )
         
         cnt = 0 
+        next_start = 0.0  # 限速：下一个任务最早开始处理的时间（monotonic）
+        pool = ThreadPoolExecutor(max_workers=self.concurrency) if self.concurrency > 1 else None
+        inflight = {}  # future -> task，线程池中排队或执行中的任务
         try: 
             task = None # None: 当前worker没有未处理完的任务
             while self.running: 
+                if pool and len(inflight) >= self.concurrency:
+                    # 处理槽位已满，等待任一任务完成再取新任务
+                    done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del inflight[future]
                 # start_time = time.time()
                 # self._handle_timeout_tasks(task_type) 
-                task_types = list(self.task_handlers.keys()) 
-                task_type = random.choices(task_types, weights=self.weights, k=1)[0]
-                if self.task_handlers[task_type]['keep_alive_callback'] and time.time() > self.task_handlers[task_type]['start_time'] + self.task_handlers[task_type]['keep_alive_interval']:
-                    if time.time() > self.task_handlers[task_type]['start_time'] + self.task_handlers[task_type]['keep_alive_interval']:
-                        self.task_handlers[task_type]['start_time'] = time.time()
-                        self.task_handlers[task_type]['keep_alive_callback'](task_type)
+                task_type = self._choose_task_type()
+                handler_info = self.task_handlers[task_type]
+                keep_alive_callback = handler_info.keep_alive_callback
+                if keep_alive_callback:
+                    now_ns = time.monotonic_ns()
+                    if now_ns > handler_info.start_ns + handler_info.keep_alive_interval_ns:
+                        handler_info.start_ns = now_ns
+                        keep_alive_callback(task_type)
                         
-                task = self.queue.get_task(task_type) 
+                if delay > 0:
+                    # 只补足距上次开始处理不足delay的部分，处理耗时已计入间隔
+                    remaining = next_start - time.monotonic()
+                    if remaining > 0:
+                        time.sleep(remaining)
+                task = self._next_task(task_type) 
+                if not task:
+                    # 按权重选中的类型暂无任务：阻塞等待任一已注册类型的任务，入队即被唤醒
+                    task = self.queue.blocking_get_task(self._task_types, timeout=poll_timeout)
                 if task:
-                    logger.info(f"[cnt={cnt}][Worker {self.worker_id}] Processing task: {task.task_id} ({task.task_type})")
-                    self._process_task(task)
+                    next_start = time.monotonic() + delay
+                    logger.info("[cnt={}][Worker {}] Processing task: {} ({})", cnt, self.worker_id, task.task_id, task.task_type)
+                    if pool:
+                        future = pool.submit(self._process_task, task)
+                        future.add_done_callback(self._log_future_error)
+                        inflight[future] = task
+                    else:
+                        self._process_task(task)
                     task = None
-                    time.sleep(delay)
                     cnt += 1
-                else:
-                    # 当前系统没有任务，防止过度消耗cpu
-                    time.sleep(poll_timeout)
                     
         except KeyboardInterrupt:
             # logger.info(f"Worker {self.worker_id} stopped by user")
@@ -91,79 +220,168 @@ class Worker:
                 logger.info(f'[Worker {self.worker_id}]: Stopped and Requeued task: {task.task_id} ({task.task_type})')
             else:
                 logger.info(f'[Worker {self.worker_id}]: Stopped and No task to requeue')
+            # 尚未开始执行的任务取消并移回todo，执行中的任务在线程池关闭时等待完成
+            for future, pending_task in inflight.items():
+                if future.cancel():
+                    self.queue.requeue_task(pending_task)
+                    logger.info(f'[Worker {self.worker_id}]: Requeued pending task: {pending_task.task_id} ({pending_task.task_type})')
+            self._requeue_prefetched()
         except Exception as e:
             import traceback
             traceback.print_exc() 
             logger.error(f"[Worker {self.worker_id}]: Error: {str(e)}")
         finally:
             self.running = False
+            if pool:
+                pool.shutdown(wait=True)
+            self._stop_scheduler()
+            self._requeue_prefetched()
             # logger.info(f"Worker {self.worker_id} stopped")
             logger.info(f"Worker {self.worker_id} stopped, calling keep_alive_callback for task_types: {self.task_handlers.keys()}")
-            for task_type in self.task_handlers.keys():
-                if self.task_handlers[task_type]['keep_alive_callback']:
-                    self.task_handlers[task_type]['keep_alive_callback'](task_type)
+            for task_type, handler_info in self.task_handlers.items():
+                if handler_info.keep_alive_callback:
+                    handler_info.keep_alive_callback(task_type)
                     
-            all_info = self.get_task_queue_info(simple=True)
-            formatted_info = json.dumps(all_info, indent=4)
-            logger.info(f"[Worker {self.worker_id}]: Stopped, task queue info: {formatted_info}")
+            logger.opt(lazy=True).info(
+                "[Worker {}]: Stopped, task queue info: {}",
+                lambda: self.worker_id,
+                lambda: json.dumps(self.get_task_queue_info(simple=True), indent=4),
+            )
+
+    def _log_future_error(self, future):
+        """线程池中_process_task未捕获的异常（如mark_done时连接出错）记入日志"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.opt(exception=error).error("[Worker {}]: Error in pooled task: {}", self.worker_id, error)
+
+    def _next_task(self, task_type: str):
+        """优先从本地预取的任务中取，取空后按batch_size一次往返批量预取
+
+        与单个取任务相同，取出的任务类型不限于task_type（各任务类型共用同一组Key）
+        """
+        prefetched = self._prefetch
+        while prefetched:
+            task = prefetched.popleft()
+            # 预取后在doing中等待期间已开始计时：取用时重置开始时间，已被过期清理的任务跳过
+            if self.queue.touch_task(task):
+                return task
+            logger.warning(f'[Worker {self.worker_id}]: Prefetched task expired: {task.task_id} ({task.task_type})')
+        batch_size = self.task_handlers[task_type].batch_size
+        if batch_size <= 1:
+            return self.queue.get_task(task_type)
+        tasks = self.queue.get_tasks_batch(task_type, batch_size)
+        if not tasks:
+            return None
+        # 批量取出的可能含其他类型：本worker未注册的类型移回todo
+        for task in tasks[1:]:
+            if task.task_type in self.task_handlers:
+                prefetched.append(task)
+            else:
+                self.queue.requeue_task(task)
+        return tasks[0]
+
+    def _requeue_prefetched(self):
+        """将预取但未处理的任务移回todo"""
+        prefetched = self._prefetch
+        while prefetched:
+            task = prefetched.popleft()
+            self.queue.requeue_task(task)
+            logger.info(f'[Worker {self.worker_id}]: Requeued prefetched task: {task.task_id} ({task.task_type})')
 
     def get_task_queue_info(self, simple: bool = False):
-        all_info = {}
-        for task_type in self.task_handlers.keys():
-            info = self.queue.get_info(task_type, simple=simple)
+        if self._scheduling_dirty:
+            self._refresh_scheduling()
+        all_info = self.queue.get_info_batch(self._task_types, simple=simple)
+        for task_type, info in all_info.items():
             info['task_type'] = task_type
             info['worker_id'] = self.worker_id
-            all_info[task_type] = info
         return all_info
 
     def stop(self):
         self.running = False
 
+    def _start_keep_alive(self, task: Task, handler_info: HandlerInfo):
+        """任务执行期间每隔keep_alive_interval调用一次keep alive回调"""
+        if not handler_info.keep_alive_callback:
+            return None
+        with self._scheduler_lock:
+            if self._scheduler_thread is None:
+                self._scheduler_stop.clear()
+                self._scheduler_thread = threading.Thread(target=self._run_scheduler, daemon=True)
+                self._scheduler_thread.start()
+        timer = _KeepAliveTimer(handler_info.keep_alive_callback, handler_info.keep_alive_interval, task)
+        timer.event = self._scheduler.enter(timer.interval, 1, self._keep_alive_tick, (timer,))
+        self._scheduler_wakeup.set()
+        return timer
+
+    def _stop_keep_alive(self, timer: _KeepAliveTimer):
+        timer.cancelled = True
+        try:
+            self._scheduler.cancel(timer.event)
+        except ValueError:
+            # 事件已触发或正在执行
+            pass
+
+    def _keep_alive_tick(self, timer: _KeepAliveTimer):
+        if timer.cancelled:
+            return
+        try:
+            timer.callback(timer.task)
+        except Exception as callback_error:
+            logger.warning("Keep-alive callback error for task {}: {}", timer.task.task_id, callback_error)
+        if not timer.cancelled:
+            timer.event = self._scheduler.enter(timer.interval, 1, self._keep_alive_tick, (timer,))
+
+    def _run_scheduler(self):
+        """调度线程：执行到期的keep-alive事件，空闲时等待到下一个事件或新事件加入"""
+        while not self._scheduler_stop.is_set():
+            self._scheduler_wakeup.clear()
+            delay = self._scheduler.run(blocking=False)
+            self._scheduler_wakeup.wait(delay)
+
+    def _stop_scheduler(self):
+        """停止并等待调度线程退出（run结束时调用，下次需要时重新启动）"""
+        with self._scheduler_lock:
+            thread, self._scheduler_thread = self._scheduler_thread, None
+        if thread is None:
+            return
+        self._scheduler_stop.set()
+        self._scheduler_wakeup.set()
+        thread.join()
+
     def _process_task(self, task: Task): 
+        keep_alive_timer = None
         try:
             handler_info = self.task_handlers.get(task.task_type)
             if not handler_info: 
                 # 说明系统推送过来一个错误任务 
-                logger.error(f"No handler for task type: {task.task_type}") 
+                logger.error("No handler for task type: {}", task.task_type) 
                 return 
                 
-            start_time = time.time()
-            keep_alive_thread = None
-            keep_alive_stop_event = None
-
-            keep_alive_callback = handler_info.get("keep_alive_callback")
-            keep_alive_interval = handler_info.get("keep_alive_interval", 120)
-
-            if keep_alive_callback:
-                keep_alive_stop_event = threading.Event()
-                keep_alive_thread = threading.Thread(
-                    target=self._keep_task_alive,
-                    args=(keep_alive_callback, keep_alive_interval, keep_alive_stop_event, task),
-                    daemon=True
-                )
-                keep_alive_thread.start()
-
-            result = handler_info["handler"](task.params)
+            start_ns = time.monotonic_ns()
+            keep_alive_timer = self._start_keep_alive(task, handler_info)
+
+            result = handler_info.handler(task.params)
             
             # 调用结果回调函数（如果存在）
-            result_callback = handler_info.get("result_callback")
+            result_callback = handler_info.result_callback
             if result_callback:
                 result_callback(task, result)
             
             # 只有在任务处理和回调都成功后才标记为完成
             self.queue.mark_done(task)
-            elapsed = time.time() - start_time
-            logger.info(f"Task completed: {task.task_id} (duration: {elapsed:.2f}s)")
+            elapsed = (time.monotonic_ns() - start_ns) / 1e9
+            logger.info("Task completed: {} (duration: {:.2f}s)", task.task_id, elapsed)
             
         except Exception as e: 
             traceback.print_exc() 
-            logger.error(f"Task failed: {task.task_id} - {str(e)}")
+            logger.error("Task failed: {} - {}", task.task_id, e)
             self.queue.mark_error(task) 
         finally:
-            if keep_alive_stop_event:
-                keep_alive_stop_event.set()
-            if keep_alive_thread:
-                keep_alive_thread.join(timeout=keep_alive_interval)
+            if keep_alive_timer:
+                self._stop_keep_alive(keep_alive_timer)
 
     def _handle_timeout_tasks(self, task_type: str): 
         # 这个应该是后台管理时处理，而非在worker中处理 
@@ -172,18 +390,3 @@ class Worker:
             logger.info(f"Found {len(timeout_tasks)} timeout tasks")
             requeued = self.queue.requeue_timeout_tasks(task_type, self.timeout_seconds)
             logger.info(f"[Worker {self.worker_id}] Requeued {requeued} timeout tasks")
-
-    def _keep_task_alive(self, callback, interval, stop_event: threading.Event, task: Task):
-        """任务执行期间定时调用keep alive回调"""
-        try:
-            while not stop_event.is_set():
-                stop_event.wait(interval)
-                if stop_event.is_set():
-                    break
-                try:
-                    callback(task)
-                except Exception as callback_error:
-                    logger.warning(f"Keep-alive callback error for task {task.task_id}: {callback_error}")
-        except Exception as e:
-            logger.error(f"Keep-alive thread unexpected error: {e}")
-            
\ No newline at end of file
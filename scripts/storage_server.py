@@ -1,38 +1,44 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, Form
 from fastapi.responses import JSONResponse, FileResponse
-import uuid
+from fastapi.concurrency import run_in_threadpool
+import secrets
 import os
 import re
-from base64 import b64encode
+import shutil
 from pathlib import Path
 
 app = FastAPI()
 
 STORAGE_DIR = Path("./file_storage").resolve()
 STORAGE_DIR.mkdir(exist_ok=True)
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+_NS_RE = re.compile(r"[A-Za-z0-9_\-]+")
 
 def _validate_namespace(ns: str) -> str:
     if not ns:
         return "default"
-    if not re.fullmatch(r"[A-Za-z0-9_\-]+", ns):
+    if not _NS_RE.fullmatch(ns):
         raise HTTPException(status_code=400, detail="invalid namespace")
     return ns
 
+def _save_upload(src, saved_path: Path):
+    with open(saved_path, "wb") as f:
+        shutil.copyfileobj(src, f, UPLOAD_CHUNK_SIZE)
+
 @app.post("/upload_file")
 async def upload_file(namespace: str = Form("default"), file: UploadFile = File(...)):
     """
     接收任意二进制文件并保存到中心服务器
     """
-    file_id = str(uuid.uuid4())
+    file_id = secrets.token_hex(16)
     ext = Path(file.filename).suffix
     ns = _validate_namespace(namespace)
     ns_dir = STORAGE_DIR / ns
     ns_dir.mkdir(exist_ok=True)
     saved_path = ns_dir / (file_id + ext)
     try:
-        with open(saved_path, "wb") as f:
-            while chunk := await file.read(1024 * 1024):
-                f.write(chunk)
+        # 文件写入在线程池中执行，避免阻塞事件循环
+        await run_in_threadpool(_save_upload, file.file, saved_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -48,9 +54,13 @@ def get_file(namespace: str, filename: str):
     if not full_path.exists():
         raise HTTPException(404)
     size = full_path.stat().st_size
-    with open(full_path, "rb") as f:
-        content_b64 = b64encode(f.read()).decode("ascii")
-    return JSONResponse({"namespace": ns, "filename": safe_name, "size": size, "file_path": str(full_path), "content_base64": content_b64})
+    # 直接流式返回文件内容（底层可走sendfile），不再整体读入内存并base64编码
+    return FileResponse(
+        full_path,
+        filename=safe_name,
+        media_type="application/octet-stream",
+        headers={"X-Namespace": ns, "X-File-Size": str(size), "X-File-Path": str(full_path)},
+    )
 
 
 @app.delete("/delete_file/{namespace}/{filename}")
@@ -71,13 +81,15 @@ def delete_namespace(namespace: str):
     if not ns_dir.is_dir():
         return {"deleted": 0}
     count = 0
-    for path in ns_dir.iterdir():
-        try:
-            if path.is_file():
-                path.unlink()
-                count += 1
-        except Exception:
-            continue
+    # 与原实现一致：is_file()跟随符号链接，指向文件的链接本身也会被删除
+    with os.scandir(ns_dir) as it:
+        for entry in it:
+            try:
+                if entry.is_file():
+                    os.unlink(entry.path)
+                    count += 1
+            except OSError:
+                continue
     return {"deleted": count}
 
 
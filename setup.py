@@ -7,9 +7,10 @@ setup(
     packages=find_packages(),
     description='A simple Python task queue',
     install_requires = [
-        "redis",
+        "redis[hiredis]",
         "psycopg2-binary", 
         "loguru",
+        "orjson",
         "tenacity",
     ],
     scripts=[],
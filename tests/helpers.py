@@ -0,0 +1,84 @@
+"""测试共用的Redis夹具与辅助函数"""
+import os
+import unittest
+from qtask_nano import TaskQueue
+
+
+def as_bytes(key):
+    """Redis连接不解码响应，比较前统一转为bytes"""
+    return key.encode() if isinstance(key, str) else key
+
+
+def get_backend(queue):
+    """取TaskQueue的底层队列：各任务类型共用同一命名空间的Key，任取一个即可"""
+    for backend in queue.queues.values():
+        return backend
+    return queue.get_or_make_queue("test_task")
+
+
+def _test_db():
+    """测试专用的Redis DB：默认15；pytest-xdist下每个worker一个DB（gw0->15, gw1->14, ...）
+    
+    超过16个worker时循环复用；各测试的命名空间带随机后缀，共用DB不会互相干扰
+    """
+    worker = os.environ.get('PYTEST_XDIST_WORKER', 'gw0')
+    return 15 - int(worker[2:]) % 16
+
+
+class SharedPoolTestCase(unittest.TestCase):
+    """同一测试类的所有队列共用一个Redis连接池，避免每个测试重新建立连接
+    
+    测试使用独立的DB，每个测试结束后FLUSHDB ASYNC清空，不触及开发/生产数据
+    """
+    redis_uri = f"redis://localhost:6379/{_test_db()}"
+    
+    @classmethod
+    def setUpClass(cls):
+        import redis
+        cls.redis_pool = redis.BlockingConnectionPool.from_url(cls.redis_uri, max_connections=16)
+        try:
+            redis.Redis(connection_pool=cls.redis_pool).ping()
+        except (redis.exceptions.ConnectionError, redis.exceptions.ResponseError) as e:
+            # Redis未启动，或测试DB不可用（如托管Redis配置databases 1）
+            cls.redis_pool.disconnect()
+            raise unittest.SkipTest(f"Redis test DB unavailable ({cls.redis_uri}): {e}")
+        # 过期清理由清理线程完成（非Redis TTL），调整hz等过期采样参数无效；
+        # 测试需要的服务端配置只有keyspace通知：整个测试类开启一次，结束时恢复原值
+        client = redis.Redis(connection_pool=cls.redis_pool)
+        try:
+            config = client.config_get('notify-keyspace-events')
+            cls._saved_notify_events = next(iter(config.values()), b'')
+            client.config_set('notify-keyspace-events', 'KA')
+            cls.keyspace_notify = True
+        except redis.exceptions.ResponseError:
+            # 托管Redis可能禁用CONFIG，退回固定等待
+            cls._saved_notify_events = None
+            cls.keyspace_notify = False
+        
+    @classmethod
+    def tearDownClass(cls):
+        import redis
+        if cls._saved_notify_events is not None:
+            redis.Redis(connection_pool=cls.redis_pool).config_set(
+                'notify-keyspace-events', cls._saved_notify_events)
+        cls.redis_pool.disconnect()
+        
+    def setUp(self):
+        # 最先注册、最后执行：各队列close（停止清理线程）之后再清空DB
+        self.addCleanup(self._flush_db)
+        
+    def _flush_db(self):
+        import redis
+        redis.Redis(connection_pool=self.redis_pool).flushdb(asynchronous=True)
+        
+    def _make_queue(self, namespace, uri):
+        """创建测试队列，测试结束时停止清理线程；共用的连接池由tearDownClass断开"""
+        queue = TaskQueue(
+            namespace=namespace,
+            uri=uri,
+            key_expire=self.key_expire,
+            cleanup_interval=0.2,
+            connection_pool=self.redis_pool if uri.startswith("redis://") else None,
+        )
+        self.addCleanup(queue.close)
+        return queue
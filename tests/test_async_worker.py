@@ -0,0 +1,163 @@
+import uuid
+import asyncio
+import unittest
+import threading
+from qtask_nano import Task, AsyncWorker
+from .helpers import SharedPoolTestCase, get_backend
+
+
+class TestAsyncWorker(SharedPoolTestCase):
+    """测试AsyncWorker的任务处理、并发限制与取消后移回todo"""
+    key_expire = None
+
+    def setUp(self):
+        super().setUp()
+        self.namespace = f"test_async_worker_{uuid.uuid4().hex[:8]}"
+        self.queue = self._make_queue(self.namespace, self.redis_uri)
+
+    def _add_tasks(self, n, task_type="async_task"):
+        tasks = [Task(task_type, {"id": i}) for i in range(n)]
+        self.queue.add_tasks(tasks)
+        return [task.encoded() for task in tasks]
+
+    async def _wait_until(self, predicate, timeout=5.0):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not predicate():
+            if loop.time() > deadline:
+                return False
+            await asyncio.sleep(0.02)
+        return True
+
+    def test_process_tasks(self):
+        """async与同步handler处理的任务均进入done"""
+        keys = self._add_tasks(3) + self._add_tasks(3, "sync_task")
+        processed = []
+
+        async def async_handler(params):
+            processed.append(params["id"])
+
+        def sync_handler(params):
+            processed.append(params["id"])
+
+        async def main():
+            worker = AsyncWorker(self.queue, "test_async_worker")
+            worker.register_task("async_task", async_handler)
+            worker.register_task("sync_task", sync_handler)
+            run = asyncio.ensure_future(worker.run(poll_timeout=0.2))
+            self.assertTrue(await self._wait_until(lambda: len(processed) == 6))
+            worker.stop()
+            await asyncio.wait_for(run, 2.0)
+
+        asyncio.run(main())
+        backend = get_backend(self.queue)
+        self.assertEqual(set(backend.get_done_keys()), set(keys))
+        self.assertEqual(backend.get_doing_keys(), [])
+
+    def test_concurrency_limit(self):
+        """同时处理的任务数不超过concurrency"""
+        self._add_tasks(6)
+        active = 0
+        max_active = 0
+        finished = 0
+
+        async def handler(params):
+            nonlocal active, max_active, finished
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.1)
+            active -= 1
+            finished += 1
+
+        async def main():
+            worker = AsyncWorker(self.queue, "test_async_worker", concurrency=2)
+            worker.register_task("async_task", handler)
+            run = asyncio.ensure_future(worker.run(poll_timeout=0.2))
+            self.assertTrue(await self._wait_until(lambda: finished == 6))
+            worker.stop()
+            await asyncio.wait_for(run, 2.0)
+
+        asyncio.run(main())
+        self.assertEqual(max_active, 2)
+
+    def test_cancel_requeues_async_handler(self):
+        """取消时处理中的async任务移回todo"""
+        keys = self._add_tasks(2)
+
+        async def main():
+            started = asyncio.Event()
+
+            async def handler(params):
+                started.set()
+                await asyncio.sleep(10)
+
+            worker = AsyncWorker(self.queue, "test_async_worker", concurrency=2)
+            worker.register_task("async_task", handler)
+            run = asyncio.ensure_future(worker.run(poll_timeout=0.2))
+            await asyncio.wait_for(started.wait(), 2.0)
+            run.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await run
+
+        asyncio.run(main())
+        backend = get_backend(self.queue)
+        self.assertEqual(set(backend.get_todo_keys()), set(keys))
+        self.assertEqual(backend.get_doing_keys(), [])
+
+    def test_cancel_waits_for_sync_handler(self):
+        """取消时等待线程中的同步handler结束后再移回todo"""
+        keys = self._add_tasks(1)
+        entered = threading.Event()
+        release = threading.Event()
+        finished = threading.Event()
+
+        def handler(params):
+            entered.set()
+            release.wait(5)
+            finished.set()
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            worker = AsyncWorker(self.queue, "test_async_worker")
+            worker.register_task("async_task", handler)
+            run = asyncio.ensure_future(worker.run(poll_timeout=0.2))
+            self.assertTrue(await loop.run_in_executor(None, entered.wait, 2.0))
+            run.cancel()
+            await asyncio.sleep(0.1)
+            # handler仍在执行，任务不应已移回todo
+            self.assertFalse(run.done())
+            self.assertEqual(get_backend(self.queue).get_todo_keys(), [])
+            release.set()
+            with self.assertRaises(asyncio.CancelledError):
+                await asyncio.wait_for(run, 2.0)
+
+        asyncio.run(main())
+        self.assertTrue(finished.is_set())
+        self.assertEqual(get_backend(self.queue).get_todo_keys(), keys)
+
+    def test_cancel_while_waiting_for_task(self):
+        """阻塞取任务期间被取消，线程中取到的任务移回todo"""
+        async def handler(params):
+            await asyncio.sleep(10)
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            worker = AsyncWorker(self.queue, "test_async_worker")
+            worker.register_task("async_task", handler)
+            run = asyncio.ensure_future(worker.run(poll_timeout=1))
+            # 等worker进入阻塞取任务，再添加任务并立即取消
+            await asyncio.sleep(0.2)
+            keys = await loop.run_in_executor(None, self._add_tasks, 1)
+            run.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await run
+            return keys
+
+        keys = asyncio.run(main())
+        backend = get_backend(self.queue)
+        self.assertEqual(backend.get_todo_keys(), keys)
+        self.assertEqual(backend.get_doing_keys(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,278 @@
+import time
+import uuid
+import random
+import unittest
+import threading
+from qtask_nano import Task, Worker
+from .helpers import SharedPoolTestCase, get_backend
+
+
+class TestWorkerPrefetch(SharedPoolTestCase):
+    """测试batch_size>1时的批量预取"""
+    key_expire = None
+
+    def setUp(self):
+        super().setUp()
+        self.namespace = f"test_worker_{uuid.uuid4().hex[:8]}"
+        self.queue = self._make_queue(self.namespace, self.redis_uri)
+
+    def _add_tasks(self, task_types):
+        tasks = [Task(task_type, {"id": i}) for i, task_type in enumerate(task_types)]
+        self.queue.add_tasks(tasks)
+        return [task.encoded() for task in tasks]
+
+    def _start(self, worker):
+        thread = threading.Thread(target=worker.run, kwargs={'poll_timeout': 0.2}, daemon=True)
+        thread.start()
+        return thread
+
+    def test_prefetch_processes_all_types(self):
+        """批量取出的其他类型任务由各自的handler处理"""
+        keys = self._add_tasks(["a", "b", "a", "b", "a"])
+        handled = []
+        all_done = threading.Event()
+
+        def make_handler(task_type):
+            def handler(params):
+                handled.append((task_type, params["id"]))
+                if len(handled) == len(keys):
+                    all_done.set()
+            return handler
+
+        worker = Worker(self.queue, "test_worker")
+        worker.register_task("a", make_handler("a"), batch_size=3)
+        worker.register_task("b", make_handler("b"))
+        thread = self._start(worker)
+        self.assertTrue(all_done.wait(5.0))
+        worker.stop()
+        thread.join(timeout=2)
+
+        self.assertEqual(sorted(handled), [("a", 0), ("a", 2), ("a", 4), ("b", 1), ("b", 3)])
+        backend = get_backend(self.queue)
+        self.assertEqual(set(backend.get_done_keys()), set(keys))
+        self.assertEqual(backend.get_doing_keys(), [])
+
+    def test_prefetch_serves_zero_weight_type(self):
+        """预取到的权重为0的类型任务同样被处理，不滞留在doing中"""
+        keys = self._add_tasks(["a", "b", "a", "b"])
+        handled = []
+        all_done = threading.Event()
+
+        def handler(params):
+            handled.append(params["id"])
+            if len(handled) == len(keys):
+                all_done.set()
+
+        worker = Worker(self.queue, "test_worker")
+        worker.register_task("a", handler, batch_size=4)
+        worker.register_task("b", handler, weight=0)
+        thread = self._start(worker)
+        self.assertTrue(all_done.wait(5.0))
+        worker.stop()
+        thread.join(timeout=2)
+
+        self.assertEqual(sorted(handled), [0, 1, 2, 3])
+        backend = get_backend(self.queue)
+        self.assertEqual(set(backend.get_done_keys()), set(keys))
+        self.assertEqual(backend.get_doing_keys(), [])
+
+    def test_prefetch_resets_start_time(self):
+        """预取的任务取用时重置doing开始时间"""
+        keys = self._add_tasks(["a", "a"])
+        backend = get_backend(self.queue)
+        scores = []
+
+        def handler(params):
+            scores.append(backend.redis.zscore(backend._doing_time_rkey, keys[params["id"]]))
+            if len(scores) == 1:
+                time.sleep(0.2)
+            else:
+                worker.stop()
+
+        worker = Worker(self.queue, "test_worker")
+        worker.register_task("a", handler, batch_size=2)
+        self._start(worker).join(timeout=5)
+
+        self.assertEqual(len(scores), 2)
+        self.assertGreaterEqual(scores[1] - scores[0], 200)
+
+    def test_prefetch_skips_evicted_task(self):
+        """预取后已不在doing中的任务被跳过"""
+        keys = self._add_tasks(["a", "a", "a"])
+        handled = []
+
+        def handler(params):
+            handled.append(params["id"])
+            if len(handled) == 1:
+                # 模拟过期清理移除第二个预取的任务
+                backend = get_backend(self.queue)
+                backend.redis.srem(backend._doing_rkey, keys[1])
+                backend.redis.zrem(backend._doing_time_rkey, keys[1])
+            else:
+                worker.stop()
+
+        worker = Worker(self.queue, "test_worker")
+        worker.register_task("a", handler, batch_size=3)
+        self._start(worker).join(timeout=5)
+
+        self.assertEqual(handled, [0, 2])
+
+    def test_requeue_prefetched_on_stop(self):
+        """停止时预取但未处理的任务移回todo"""
+        keys = self._add_tasks(["a", "a", "a"])
+
+        def handler(params):
+            worker.stop()
+
+        worker = Worker(self.queue, "test_worker")
+        worker.register_task("a", handler, batch_size=3)
+        thread = self._start(worker)
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+
+        backend = get_backend(self.queue)
+        self.assertEqual(backend.get_done_keys(), keys[:1])
+        self.assertEqual(set(backend.get_todo_keys()), set(keys[1:]))
+        self.assertEqual(backend.get_doing_keys(), [])
+
+
+
+class TestWorkerConcurrency(SharedPoolTestCase):
+    """测试concurrency>1时的线程池处理"""
+    key_expire = None
+
+    def setUp(self):
+        super().setUp()
+        self.namespace = f"test_worker_{uuid.uuid4().hex[:8]}"
+        self.queue = self._make_queue(self.namespace, self.redis_uri)
+        tasks = [Task("a", {"id": i}) for i in range(6)]
+        self.queue.add_tasks(tasks)
+        self.keys = [task.encoded() for task in tasks]
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.handled = []
+
+    def _handler(self, params):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.1)
+        with self.lock:
+            self.active -= 1
+            self.handled.append(self.keys[params["id"]])
+
+    def test_concurrency_limit(self):
+        """同时执行的handler数不超过concurrency"""
+        worker = Worker(self.queue, "test_worker", concurrency=2)
+        worker.register_task("a", self._handler)
+        thread = threading.Thread(target=worker.run, kwargs={'poll_timeout': 0.2}, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 5.0
+        while len(self.handled) < len(self.keys) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        worker.stop()
+        thread.join(timeout=2)
+
+        self.assertEqual(len(self.handled), len(self.keys))
+        self.assertEqual(self.max_active, 2)
+        self.assertEqual(set(get_backend(self.queue).get_done_keys()), set(self.keys))
+
+    def test_interrupt_requeues_pending(self):
+        """KeyboardInterrupt时执行中的任务完成，未开始的任务移回todo"""
+        worker = Worker(self.queue, "test_worker", concurrency=2)
+        worker.register_task("a", self._handler)
+        calls = 0
+
+        def interrupting_random():
+            # 调度循环每次取任务前调用一次：第4次时模拟Ctrl+C
+            nonlocal calls
+            calls += 1
+            if calls == 4:
+                raise KeyboardInterrupt()
+            return 0.0
+
+        worker._random = interrupting_random
+        thread = threading.Thread(target=worker.run, kwargs={'poll_timeout': 0.2}, daemon=True)
+        thread.start()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+
+        backend = get_backend(self.queue)
+        done = backend.get_done_keys()
+        todo = backend.get_todo_keys()
+        self.assertEqual(backend.get_doing_keys(), [])
+        self.assertLessEqual(self.max_active, 2)
+        self.assertEqual(set(done), set(self.handled))
+        self.assertEqual(sorted(done + todo), sorted(self.keys))
+        self.assertLess(len(done), len(self.keys))
+
+
+
+class TestWorkerKeepAlive(SharedPoolTestCase):
+    """测试任务级keep-alive的调度线程"""
+    key_expire = None
+
+    def test_scheduler_thread_stops_with_run(self):
+        """run结束时keep-alive调度线程随之退出"""
+        queue = self._make_queue(f"test_worker_{uuid.uuid4().hex[:8]}", self.redis_uri)
+        queue.add_task(Task("a", {"id": 0}))
+        threads = []
+
+        def keep_alive(task):
+            # 任务级回调收到Task，类型级回调（调度循环中调用）收到task_type
+            if isinstance(task, Task):
+                threads.append(threading.current_thread())
+
+        def handler(params):
+            time.sleep(0.2)
+            worker.stop()
+
+        worker = Worker(queue, "test_worker")
+        worker.register_task("a", handler, keep_alive_callback=keep_alive, keep_alive_interval=0.05)
+        thread = threading.Thread(target=worker.run, kwargs={'poll_timeout': 0.2}, daemon=True)
+        thread.start()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+
+        self.assertTrue(threads)
+        self.assertIsNone(worker._scheduler_thread)
+        self.assertFalse(threads[0].is_alive())
+
+
+class TestWorkerScheduling(unittest.TestCase):
+    """测试按权重选择任务类型（不访问队列）"""
+
+    def test_invalid_weights(self):
+        """权重为负或总和为0时注册即报错"""
+        worker = Worker(None, "test_worker")
+        with self.assertRaises(ValueError):
+            worker.register_task("a", print, weight=-1)
+        with self.assertRaises(ValueError):
+            worker.register_task("a", print, weight=0)
+        worker.register_task("a", print, weight=1)
+        worker.register_task("b", print, weight=0)
+        with self.assertRaises(ValueError):
+            worker.register_task("a", print, weight=0)
+
+    def test_weighted_distribution(self):
+        """固定随机种子下，各类型被选中的频率接近权重占比"""
+        worker = Worker(None, "test_worker")
+        weights = {"a": 1, "b": 3, "c": 6, "d": 0}
+        for task_type, weight in weights.items():
+            worker.register_task(task_type, print, weight=weight)
+        worker._refresh_scheduling()
+        worker._random = random.Random(12345).random
+
+        n = 100000
+        counts = dict.fromkeys(weights, 0)
+        for _ in range(n):
+            counts[worker._choose_task_type()] += 1
+        total = sum(weights.values())
+        for task_type, weight in weights.items():
+            self.assertAlmostEqual(counts[task_type] / n, weight / total, delta=0.01)
+        self.assertEqual(counts["d"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()